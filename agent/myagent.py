@@ -1,9 +1,15 @@
 import logging
 import asyncio
-import json
+import functools
+import re
+import weakref
+from types import MappingProxyType
 from typing import Literal, TypedDict
+import orjson
 from dotenv import load_dotenv
-from livekit.agents import JobContext, WorkerOptions, cli
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli
+from livekit.agents import tokenize as lk_tokenize
+from livekit.agents.tts import StreamAdapter
 from livekit.agents.voice import Agent, AgentSession
 from langgraph.graph import END, StateGraph
 from livekit.plugins import deepgram, groq, sarvam, silero, google 
@@ -21,17 +27,31 @@ class OrchestrationState(TypedDict):
     instructions: str
 
 
-SUPPORTED_MODES = {"general", "sales", "support", "technical"}
+SUPPORTED_MODES = frozenset({"general", "sales", "support", "technical"})
 
+# Shared read-only template for the initial graph state.
+_EMPTY_ORCHESTRATION_STATE = MappingProxyType(
+    {
+        "selected_lang": "",
+        "task_mode": "",
+        "route": "",
+        "instructions": "",
+    }
+)
+
+
+def _normalize_selection(selected_lang: str, task_mode: str) -> tuple[str, str]:
+    lang = "hi" if selected_lang == "hi" else "en"
+    mode = task_mode.lower().strip()
+    if mode not in SUPPORTED_MODES:
+        mode = "general"
+    return lang, mode
 
-def _supervisor_node(state: OrchestrationState) -> OrchestrationState:
-    selected_lang = state["selected_lang"]
-    task_mode = state["task_mode"].lower().strip()
 
-    if task_mode not in SUPPORTED_MODES:
-        task_mode = "general"
+def _supervisor_node(state: OrchestrationState) -> OrchestrationState:
+    lang, task_mode = _normalize_selection(state["selected_lang"], state["task_mode"])
 
-    route = f"{task_mode}_{'hi' if selected_lang == 'hi' else 'en'}"
+    route = f"{task_mode}_{lang}"
     return {
         **state,
         "task_mode": task_mode,
@@ -131,97 +151,183 @@ def _route_from_supervisor(state: OrchestrationState) -> str:
     return state["route"]
 
 
+SPECIALIST_NODES = {
+    "general_hi": _general_hi_node,
+    "general_en": _general_en_node,
+    "sales_hi": _sales_hi_node,
+    "sales_en": _sales_en_node,
+    "support_hi": _support_hi_node,
+    "support_en": _support_en_node,
+    "technical_hi": _technical_hi_node,
+    "technical_en": _technical_en_node,
+}
+
+
 def build_orchestrator():
     graph = StateGraph(OrchestrationState)
     graph.add_node("supervisor", _supervisor_node)
 
-    graph.add_node("general_hi", _general_hi_node)
-    graph.add_node("general_en", _general_en_node)
-    graph.add_node("sales_hi", _sales_hi_node)
-    graph.add_node("sales_en", _sales_en_node)
-    graph.add_node("support_hi", _support_hi_node)
-    graph.add_node("support_en", _support_en_node)
-    graph.add_node("technical_hi", _technical_hi_node)
-    graph.add_node("technical_en", _technical_en_node)
+    for node_name, node_fn in SPECIALIST_NODES.items():
+        graph.add_node(node_name, node_fn)
 
     graph.set_entry_point("supervisor")
 
     graph.add_conditional_edges(
         "supervisor",
         _route_from_supervisor,
-        {
-            "general_hi": "general_hi",
-            "general_en": "general_en",
-            "sales_hi": "sales_hi",
-            "sales_en": "sales_en",
-            "support_hi": "support_hi",
-            "support_en": "support_en",
-            "technical_hi": "technical_hi",
-            "technical_en": "technical_en",
-        },
+        {node_name: node_name for node_name in SPECIALIST_NODES},
     )
 
-    for node_name in [
-        "general_hi",
-        "general_en",
-        "sales_hi",
-        "sales_en",
-        "support_hi",
-        "support_en",
-        "technical_hi",
-        "technical_en",
-    ]:
+    for node_name in SPECIALIST_NODES:
         graph.add_edge(node_name, END)
 
     return graph.compile()
 
 
-ORCHESTRATOR = build_orchestrator()
+def _build_instruction_table() -> MappingProxyType:
+    # Every (lang, mode) pair resolves to a static instruction string, so run
+    # each specialist node once here instead of traversing the graph per call.
+    table = {}
+    for mode in SUPPORTED_MODES:
+        for lang in ("hi", "en"):
+            route = f"{mode}_{lang}"
+            state = SPECIALIST_NODES[route](
+                {**_EMPTY_ORCHESTRATION_STATE, "selected_lang": lang, "task_mode": mode, "route": route}
+            )
+            table[(lang, mode)] = (route, state["instructions"])
+    return MappingProxyType(table)
+
+
+_INSTRUCTION_TABLE = _build_instruction_table()
+
+
+# The graph is only needed for modes the static table doesn't cover; it is
+# compiled once per job process in prewarm rather than at import.
+@functools.cache
+def get_orchestrator():
+    return build_orchestrator()
 
 
 def get_orchestrated_instructions(selected_lang: str, task_mode: str) -> tuple[str, str]:
-    result = ORCHESTRATOR.invoke(
-        {
-            "selected_lang": selected_lang,
-            "task_mode": task_mode,
-            "route": "",
-            "instructions": "",
-        }
+    if task_mode.lower().strip() in SUPPORTED_MODES:
+        return _INSTRUCTION_TABLE[_normalize_selection(selected_lang, task_mode)]
+
+    result = get_orchestrator().invoke(
+        {**_EMPTY_ORCHESTRATION_STATE, "selected_lang": selected_lang, "task_mode": task_mode}
     )
     route = result.get("route", "general_en")
     instructions = result.get("instructions", "You are a helpful assistant. Respond briefly.")
     return route, instructions
 
+
+# Sentence ends for both English and Hindi. The stock tokenizers don't treat the
+# danda (।) as a boundary, so Hindi replies were only sent to TTS once a "?",
+# "!" or the end of the LLM response showed up.
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?।])\s+")
+
+
+class HindiAwareSentenceTokenizer(lk_tokenize.SentenceTokenizer):
+    def __init__(self, min_sentence_len: int = 20, stream_context_len: int = 10) -> None:
+        self._min_sentence_len = min_sentence_len
+        self._stream_context_len = stream_context_len
+
+    def tokenize(self, text: str, *, language: str | None = None) -> list[str]:
+        return [s for s in _SENTENCE_END_RE.split(text.strip()) if s]
+
+    def stream(self, *, language: str | None = None) -> lk_tokenize.SentenceStream:
+        return lk_tokenize.BufferedSentenceStream(
+            tokenizer=self.tokenize,
+            min_token_len=self._min_sentence_len,
+            min_ctx_len=self._stream_context_len,
+        )
+
+
+# Not cached: each job process runs a single job and exits, so a cache would
+# never be hit, and provider clients hold the job's HTTP session, which is
+# closed when the job ends.
+def _build_stt(lang: str):
+    return deepgram.STT(
+        model="nova-2",
+        language=lang
+    )
+
+
+def _build_tts(voice: str):
+    if voice == "sarvam":
+        return sarvam.TTS(
+            target_language_code="hi-IN",
+            speaker="vidya",
+            pitch= 0,
+            pace= 1,
+            loudness= 1,
+            speech_sample_rate= 24000,
+            enable_preprocessing= "true",
+            model= "bulbul:v2"
+        )
+    elif voice == "gemini":
+        # Gemini TTS only synthesizes whole requests; feed it one sentence at a time
+        # so the first sentence plays while the LLM is still generating the rest.
+        return StreamAdapter(
+            tts=google.beta.GeminiTTS(
+                model="models/gemini-2.5-flash-preview-tts",
+                voice_name="Zephyr",
+                instructions="Speak.",
+            ),
+            sentence_tokenizer=HindiAwareSentenceTokenizer(),
+        )
+    else:
+        # Fallback
+        return sarvam.TTS(target_language_code="hi-IN", speaker="vidya")
+
+
 class LocalAgent(Agent):
     # Modified __init__ to accept configured STT and TTS
-    def __init__(self, stt_instance, tts_instance, instructions, orchestration_route) -> None:
+    def __init__(self, stt_instance, tts_instance, vad_instance, instructions, orchestration_route) -> None:
         llm = groq.LLM(model="llama-3.3-70b-versatile")
-        vad_inst = silero.VAD.load()
 
         super().__init__(
             instructions=instructions,
             stt=stt_instance,
             llm=llm,
             tts=tts_instance,
-            vad=vad_inst
+            vad=vad_instance
         )
 
         logger.info(f"LangGraph selected route: {orchestration_route}")
         
-        # ... (Metrics wrappers remain the same) ...
-        def llm_metrics_wrapper(metrics):
-            asyncio.create_task(self.on_llm_metrics_collected(metrics))
-        llm.on("metrics_collected", llm_metrics_wrapper)
+        # The prewarmed VAD outlives this agent, so remember every handler we
+        # attach and detach them again in on_exit.
+        self._listeners = []
+
+        self._listen(llm, "metrics_collected", self.on_llm_metrics_collected)
         
         # Note: You might need to check if stt/tts support metric events before binding
         if hasattr(stt_instance, "on"):
-            stt_instance.on("metrics_collected", lambda m: asyncio.create_task(self.on_stt_metrics_collected(m)))
-            stt_instance.on("eou_metrics_collected", lambda m: asyncio.create_task(self.on_eou_metrics_collected(m)))
+            self._listen(stt_instance, "metrics_collected", self.on_stt_metrics_collected)
+            self._listen(stt_instance, "eou_metrics_collected", self.on_eou_metrics_collected)
         
         if hasattr(tts_instance, "on"):
-            tts_instance.on("metrics_collected", lambda m: asyncio.create_task(self.on_tts_metrics_collected(m)))
+            self._listen(tts_instance, "metrics_collected", self.on_tts_metrics_collected)
             
-        vad_inst.on("metrics_collected", lambda m: asyncio.create_task(self.on_vad_event(m)))
+        self._listen(vad_instance, "metrics_collected", self.on_vad_event)
+
+    def _listen(self, emitter, event, callback) -> None:
+        # Hold the agent weakly so providers that outlive it (the prewarmed VAD)
+        # never keep a finished session alive, even if on_exit is skipped.
+        callback_ref = weakref.WeakMethod(callback)
+
+        def handler(payload):
+            bound = callback_ref()
+            if bound is not None:
+                asyncio.create_task(bound(payload))
+
+        emitter.on(event, handler)
+        self._listeners.append((emitter, event, handler))
+
+    async def on_exit(self) -> None:
+        for emitter, event, handler in self._listeners:
+            emitter.off(event, handler)
+        self._listeners.clear()
 
     async def on_llm_metrics_collected(self, metrics):
         logger.info(f"LLM Metrics: {metrics}")
@@ -234,6 +340,13 @@ class LocalAgent(Agent):
     async def on_vad_event(self, event):
         pass
 
+def prewarm(proc: JobProcess):
+    # Runs once per job process before it accepts work, keeping model loading
+    # and graph compilation off the participant-join path.
+    proc.userdata["vad"] = silero.VAD.load()
+    get_orchestrator()
+
+
 async def entrypoint(ctx: JobContext):
     await ctx.connect()
     
@@ -248,7 +361,7 @@ async def entrypoint(ctx: JobContext):
     # 3. Read Metadata passed from Frontend
     if participant.metadata:
         try:
-            meta = json.loads(participant.metadata)
+            meta = orjson.loads(participant.metadata)
             selected_lang = meta.get("language", "hi")
             selected_voice = meta.get("voice", "sarvam")
             selected_mode = meta.get("mode", "general")
@@ -262,33 +375,10 @@ async def entrypoint(ctx: JobContext):
     # If Hindi -> 'hi', if English -> 'en'
     stt_lang = "hi" if selected_lang == "hi" else "en"
     
-    stt = deepgram.STT(
-        model="nova-2",
-        language=stt_lang
-    )
+    stt = _build_stt(stt_lang)
 
     # 5. Configure TTS based on Voice Selection
-    tts = None
-    if selected_voice == "sarvam":
-        tts = sarvam.TTS(
-            target_language_code="hi-IN",  
-            speaker="vidya",
-            pitch= 0,
-            pace= 1,
-            loudness= 1,
-            speech_sample_rate= 24000,
-            enable_preprocessing= "true",
-            model= "bulbul:v2"
-        )
-    elif selected_voice == "gemini":
-        tts = google.beta.GeminiTTS(
-   model="models/gemini-2.5-flash-preview-tts",
-   voice_name="Zephyr",
-   instructions="Speak.",
-  )
-    else:
-        # Fallback
-        tts = sarvam.TTS(target_language_code="hi-IN", speaker="vidya")
+    tts = _build_tts(selected_voice)
 
     # 6. Orchestrate instructions with LangGraph supervisor + specialized agents
     orchestration_route, instructions = get_orchestrated_instructions(
@@ -303,6 +393,7 @@ async def entrypoint(ctx: JobContext):
     agent = LocalAgent(
         stt_instance=stt,
         tts_instance=tts,
+        vad_instance=ctx.proc.userdata["vad"],
         instructions=instructions,
         orchestration_route=orchestration_route,
     )
@@ -313,4 +404,4 @@ async def entrypoint(ctx: JobContext):
     )
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, job_memory_warn_mb=1500))
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, job_memory_warn_mb=1500))
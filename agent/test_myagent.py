@@ -0,0 +1,20 @@
+"""Tests for the voice agent module"""
+import myagent
+
+
+def test_sentence_tokenizer_splits_on_danda():
+    """Test Hindi sentences are split on the danda as well as "?"."""
+    tokens = myagent.HindiAwareSentenceTokenizer().tokenize("नमस्ते। आप कैसे हैं?")
+    assert tokens == ["नमस्ते।", "आप कैसे हैं?"]
+
+
+def test_supported_modes_skip_the_graph(monkeypatch):
+    """Test case/whitespace variants of supported modes resolve from the table"""
+    def fail():
+        raise AssertionError("LangGraph should not be invoked")
+
+    monkeypatch.setattr(myagent, "get_orchestrator", fail)
+
+    route, instructions = myagent.get_orchestrated_instructions("en", " Sales ")
+    assert route == "sales_en"
+    assert instructions.startswith("You are an English sales assistant.")
@@ -3,8 +3,11 @@ LiveKit Dashboard - Main Application
 Stateless SSR dashboard for LiveKit server management
 """
 
+import logging
 import os
+import queue
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -21,10 +24,25 @@ from app.routes import overview, rooms, egress, sip, settings, sandbox, auth
 from app.security.csrf import get_csrf_token
 
 
+# Application loggers enqueue records; a background listener thread does the actual
+# stderr writes so request handlers never block on log I/O.
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(
+    logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+)
+log_listener = QueueListener(log_queue, log_stream_handler)
+
+app_logger = logging.getLogger("app")
+app_logger.addHandler(QueueHandler(log_queue))
+app_logger.setLevel(logging.INFO)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown events"""
     # Startup
+    log_listener.start()
     print("🚀 LiveKit Dashboard starting up...")
     print(f"   LiveKit URL: {os.environ.get('LIVEKIT_URL', 'Not set')}")
     print(f"   SIP Enabled: {os.environ.get('ENABLE_SIP', 'false')}")
@@ -42,6 +60,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     print("👋 LiveKit Dashboard shutting down...")
+    log_listener.stop()
 
 
 # Create FastAPI app
@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, status, Header
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
-from typing import Optional, Tuple, BinaryIO, Any
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, StreamingResponse
+from typing import Optional, Tuple, Any
 from datetime import datetime
 from pathlib import Path
+import functools
+import logging
 import os
-import mimetypes
+import re
+import time
+
+import aiofiles
 
 from app.services.livekit import LiveKitClient, get_livekit_client
 from app.security.basic_auth import requires_admin, get_current_user
@@ -16,11 +21,21 @@ from livekit.api.webhook import WebhookReceiver
 
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Change this to where your egress service writes files (mp4/webm/ogg)
 RECORDINGS_DIR = Path(os.getenv("RECORDINGS_DIR", "/recordings")).resolve()
 VIDEO_EXTS = {".mp4", ".webm"}
 AUDIO_EXTS = {".ogg", ".opus", ".mp3", ".wav", ".m4a"}
+CONTENT_TYPES = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".m4a": "audio/mp4",
+}
 
 # Webhook auth
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY", "")
@@ -35,7 +50,15 @@ AUTO_RECORD_FILENAME_TMPL = os.getenv(
     "{room}-{sip_call_id}-{time}.mp4",
 )
 
+_FILENAME_PLACEHOLDER_RE = re.compile(r"\{(room|room_name|time|sip_call_id)\}")
+
+
+def _format_filename(template: str, **values: str) -> str:
+    # Single pass over the template; placeholders without a value are left as-is.
+    return _FILENAME_PLACEHOLDER_RE.sub(lambda m: values.get(m.group(1), m.group(0)), template)
 
+
+@functools.lru_cache(maxsize=1)
 def _webhook_receiver() -> WebhookReceiver:
     if not LIVEKIT_API_KEY or not LIVEKIT_API_SECRET:
         raise RuntimeError("LIVEKIT_API_KEY / LIVEKIT_API_SECRET not set")
@@ -43,28 +66,53 @@ def _webhook_receiver() -> WebhookReceiver:
     return WebhookReceiver(verifier)
 
 
+# (directory mtime in ns, scan time, (mtime, filename, size) tuples sorted newest first).
+# Adding, removing or renaming a recording bumps the directory mtime, but egress appending to a
+# file it is still writing does not, so the listing is also rescanned once it is older than
+# RECORDINGS_CACHE_TTL seconds to keep sizes and times of in-progress recordings fresh.
+RECORDINGS_CACHE_TTL = 5.0
+_recordings_cache: Tuple[int, float, list] = (-1, 0.0, [])
+
+
+def _scan_recordings() -> list:
+    entries = []
+    # scandir reports the file type from the directory read itself, so only audio files are stat'ed.
+    with os.scandir(RECORDINGS_DIR) as it:
+        for entry in it:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            if os.path.splitext(entry.name)[1].lower() not in AUDIO_EXTS:
+                continue
+
+            st = entry.stat(follow_symlinks=False)
+            entries.append((st.st_mtime, entry.name, st.st_size))
+
+    entries.sort(reverse=True)
+    return entries
+
+
 def list_recordings(limit: int = 200):
-    items = []
-    if not RECORDINGS_DIR.exists():
-        return items
-
-    for p in RECORDINGS_DIR.iterdir():
-        if not p.is_file():
-            continue
-        if p.suffix.lower() not in AUDIO_EXTS:
-            continue
-
-        st = p.stat()
-        items.append(
-            {
-                "filename": p.name,
-                "size": st.st_size,
-                "mtime": datetime.fromtimestamp(st.st_mtime),
-            }
-        )
+    global _recordings_cache
 
-    items.sort(key=lambda x: x["mtime"], reverse=True)
-    return items[:limit]
+    try:
+        dir_mtime = RECORDINGS_DIR.stat().st_mtime_ns
+    except OSError:
+        return []
+
+    now = time.monotonic()
+    cached_mtime, scanned_at, entries = _recordings_cache
+    if cached_mtime != dir_mtime or now - scanned_at > RECORDINGS_CACHE_TTL:
+        entries = _scan_recordings()
+        _recordings_cache = (dir_mtime, now, entries)
+
+    return [
+        {
+            "filename": name,
+            "size": size,
+            "mtime": datetime.fromtimestamp(mtime),
+        }
+        for mtime, name, size in entries[:limit]
+    ]
 
 
 def parse_range_header(range_header: str, file_size: int) -> Tuple[int, int]:
@@ -84,14 +132,16 @@ def parse_range_header(range_header: str, file_size: int) -> Tuple[int, int]:
     return start, end
 
 
-def iter_file_range(file_obj: BinaryIO, start: int, end: int, chunk_size: int = 1024 * 1024):
-    with file_obj as f:
-        f.seek(start)
-        while (pos := f.tell()) <= end:
-            to_read = min(chunk_size, end + 1 - pos)
-            data = f.read(to_read)
+async def iter_file_range(file_path: Path, start: int, end: int, chunk_size: int = 1024 * 1024):
+    # aiofiles runs each read in a worker thread so multi-MB streams don't stall the event loop.
+    async with aiofiles.open(file_path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = await f.read(min(chunk_size, remaining))
             if not data:
                 break
+            remaining -= len(data)
             yield data
 
 
@@ -102,35 +152,33 @@ async def serve_recording(filename: str, request: Request):
     """
     # Path traversal protection
     file_path = (RECORDINGS_DIR / filename).resolve()
-    if RECORDINGS_DIR not in file_path.parents:
+    if not file_path.is_relative_to(RECORDINGS_DIR):
         raise HTTPException(status_code=403, detail="Forbidden")
 
     if not file_path.exists() or not file_path.is_file():
         raise HTTPException(status_code=404, detail="Not found")
 
     file_size = file_path.stat().st_size
-    content_type = mimetypes.guess_type(str(file_path))[0] or "application/octet-stream"
+    content_type = CONTENT_TYPES.get(file_path.suffix.lower(), "application/octet-stream")
 
     range_header = request.headers.get("range")
-    start, end = 0, file_size - 1
-    status_code = status.HTTP_200_OK
+    if not range_header:
+        # Whole-file requests go through Starlette's FileResponse, which streams asynchronously.
+        return FileResponse(file_path, media_type=content_type, headers={"Accept-Ranges": "bytes"})
 
+    start, end = parse_range_header(range_header, file_size)
     headers = {
         "Accept-Ranges": "bytes",
         "Content-Type": content_type,
+        "Content-Range": f"bytes {start}-{end}/{file_size}",
+        "Content-Length": str(end - start + 1),
     }
 
-    if range_header:
-        start, end = parse_range_header(range_header, file_size)
-        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
-        headers["Content-Length"] = str(end - start + 1)
-        status_code = status.HTTP_206_PARTIAL_CONTENT
-    else:
-        headers["Content-Length"] = str(file_size)
-
+    # Ranges are streamed rather than sent with sendfile: ASGI does not expose the socket to
+    # the app, and uvicorn does not implement the http.response.zerocopysend extension.
     return StreamingResponse(
-        iter_file_range(open(file_path, "rb"), start, end),
-        status_code=status_code,
+        iter_file_range(file_path, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
         headers=headers,
     )
 
@@ -169,8 +217,11 @@ async def start_egress(
     await verify_csrf_token(request)
 
     # Replace placeholders in filename
-    filename = output_filename.replace("{room}", room_name)
-    filename = filename.replace("{time}", datetime.now().strftime("%Y%m%d_%H%M%S"))
+    filename = _format_filename(
+        output_filename,
+        room=room_name,
+        time=datetime.now().strftime("%Y%m%d_%H%M%S"),
+    )
 
     # Optional: enforce extension for video recordings
     if not Path(filename).suffix:
@@ -185,7 +236,7 @@ async def start_egress(
             video_only=(video_only == "on"),
         )
     except Exception as e:
-        print(f"Error starting egress: {e}")
+        logger.exception("Error starting egress: %s", e)
 
     return RedirectResponse(url="/egress", status_code=303)
 
@@ -202,28 +253,37 @@ async def stop_egress(
     try:
         await lk.stop_egress(egress_id)
     except Exception as e:
-        print(f"Error stopping egress: {e}")
+        logger.exception("Error stopping egress: %s", e)
 
     return RedirectResponse(url="/egress", status_code=303)
 
 
-def _safe_get(obj: Any, path: str, default=None):
-    cur = obj
-    for key in path.split("."):
-        if cur is None:
-            return default
-        if isinstance(cur, dict):
-            cur = cur.get(key)
-        else:
-            cur = getattr(cur, key, None)
-    return cur if cur is not None else default
+def _field(obj: Any, name: str):
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+# Accessors for the fixed webhook fields we read; events may be SDK objects or plain dicts.
+def _participant_kind(event):
+    return _field(_field(event, "participant"), "kind")
+
+
+def _participant_attributes(event):
+    return _field(_field(event, "participant"), "attributes") or {}
+
+
+def _room_name(event):
+    return _field(_field(event, "room"), "name")
 
 
 def _is_sip_participant(event) -> bool:
     # Prefer "kind == SIP", but also accept the presence of SIP attributes as a fallback.
-    kind = _safe_get(event, "participant.kind")
+    kind = _participant_kind(event)
     kind_s = str(kind).upper() if kind is not None else ""
-    attrs = _safe_get(event, "participant.attributes", {}) or {}
+    attrs = _participant_attributes(event)
     if not isinstance(attrs, dict):
         try:
             attrs = dict(attrs)
@@ -235,17 +295,13 @@ def _is_sip_participant(event) -> bool:
 
 async def _already_recording_room(lk: LiveKitClient, room_name: str) -> bool:
     try:
-        active = await lk.list_egress(active=True)
+        # Let LiveKit filter by room so the response only carries this room's jobs.
+        active = await lk.list_egress(room_name=room_name, active=True)
     except Exception:
         return False
 
     for j in active or []:
-        rn = None
-        if isinstance(j, dict):
-            rn = j.get("room_name") or _safe_get(j, "room_name")
-        else:
-            rn = getattr(j, "room_name", None)
-        if rn == room_name:
+        if _field(j, "room_name") == room_name:
             return True
     return False
 
@@ -279,7 +335,7 @@ async def livekit_webhook(
     if not _is_sip_participant(event):
         return {"ok": True, "ignored": "not-sip"}
 
-    room_name = _safe_get(event, "room.name")
+    room_name = _room_name(event)
     if not room_name:
         return {"ok": True, "ignored": "no-room-name"}
 
@@ -287,18 +343,18 @@ async def livekit_webhook(
     if await _already_recording_room(lk, room_name):
         return {"ok": True, "recording": "already-running"}
 
-    attrs = _safe_get(event, "participant.attributes", {}) or {}
+    attrs = _participant_attributes(event)
     sip_call_id = None
     if isinstance(attrs, dict):
         sip_call_id = attrs.get("sip.callID") or attrs.get("sip.callIDFull")
 
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = (
-        AUTO_RECORD_FILENAME_TMPL
-        .replace("{room}", room_name)
-        .replace("{room_name}", room_name)
-        .replace("{time}", now)
-        .replace("{sip_call_id}", sip_call_id or "sip")
+    filename = _format_filename(
+        AUTO_RECORD_FILENAME_TMPL,
+        room=room_name,
+        room_name=room_name,
+        time=now,
+        sip_call_id=sip_call_id or "sip",
     )
     if not Path(filename).suffix:
         filename = f"{filename}.mp4"
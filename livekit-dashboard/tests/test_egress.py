@@ -0,0 +1,103 @@
+"""Tests for egress route helpers"""
+import os
+
+import pytest
+
+from app.routes import egress
+from app.routes.egress import _format_filename
+
+
+@pytest.fixture
+def recordings_dir(tmp_path, monkeypatch):
+    """Point the egress module at an empty recordings directory"""
+    monkeypatch.setattr(egress, "RECORDINGS_DIR", tmp_path)
+    monkeypatch.setattr(egress, "_recordings_cache", (-1, 0.0, []))
+    return tmp_path
+
+
+def test_format_filename_substitutes_placeholders():
+    """Test all known placeholders are substituted in one pass"""
+    filename = _format_filename(
+        "{room}-{sip_call_id}-{time}.mp4",
+        room="lobby",
+        sip_call_id="SCL_123",
+        time="20240101_120000",
+    )
+    assert filename == "lobby-SCL_123-20240101_120000.mp4"
+
+
+def test_format_filename_leaves_missing_placeholders():
+    """Test placeholders without a value are kept verbatim"""
+    filename = _format_filename("{room}-{sip_call_id}", room="lobby")
+    assert filename == "lobby-{sip_call_id}"
+
+
+def test_format_filename_does_not_expand_values():
+    """Test substituted values are not re-scanned for placeholders"""
+    filename = _format_filename("{room}-{time}", room="{time}", time="now")
+    assert filename == "{time}-now"
+
+
+def test_list_recordings_filters_and_sorts(recordings_dir):
+    """Test only audio files are listed, newest first"""
+    for name, mtime in [("old.ogg", 1_000), ("new.mp3", 2_000), ("video.mp4", 3_000)]:
+        path = recordings_dir / name
+        path.write_bytes(b"x")
+        os.utime(path, (mtime, mtime))
+
+    names = [r["filename"] for r in egress.list_recordings()]
+    assert names == ["new.mp3", "old.ogg"]
+
+
+def test_list_recordings_uses_cache_until_directory_changes(recordings_dir):
+    """Test the listing is rescanned only when the directory mtime changes"""
+    (recordings_dir / "a.ogg").write_bytes(b"x")
+    os.utime(recordings_dir, (1_000, 1_000))
+    assert [r["filename"] for r in egress.list_recordings()] == ["a.ogg"]
+
+    # Same directory mtime: cached listing is served even though a file was added.
+    (recordings_dir / "b.ogg").write_bytes(b"x")
+    os.utime(recordings_dir, (1_000, 1_000))
+    assert [r["filename"] for r in egress.list_recordings()] == ["a.ogg"]
+
+    os.utime(recordings_dir, (2_000, 2_000))
+    assert {r["filename"] for r in egress.list_recordings()} == {"a.ogg", "b.ogg"}
+
+
+def test_list_recordings_refreshes_after_ttl(recordings_dir, monkeypatch):
+    """Test a growing recording's size is picked up once the cache expires"""
+    path = recordings_dir / "a.ogg"
+    path.write_bytes(b"x")
+    os.utime(recordings_dir, (1_000, 1_000))
+    assert egress.list_recordings()[0]["size"] == 1
+
+    # Appending does not touch the directory mtime; only the TTL forces a rescan.
+    path.write_bytes(b"xyz")
+    os.utime(recordings_dir, (1_000, 1_000))
+    assert egress.list_recordings()[0]["size"] == 1
+
+    monkeypatch.setattr(egress, "RECORDINGS_CACHE_TTL", -1.0)
+    assert egress.list_recordings()[0]["size"] == 3
+
+
+def test_list_recordings_missing_directory(tmp_path, monkeypatch):
+    """Test a missing recordings directory yields an empty listing"""
+    monkeypatch.setattr(egress, "RECORDINGS_DIR", tmp_path / "missing")
+    monkeypatch.setattr(egress, "_recordings_cache", (-1, 0.0, []))
+    assert egress.list_recordings() == []
+
+
+def test_is_sip_participant_from_dict_event():
+    """Test SIP detection from kind and from SIP attributes"""
+    assert egress._is_sip_participant({"participant": {"kind": "SIP"}})
+    assert egress._is_sip_participant(
+        {"participant": {"kind": "STANDARD", "attributes": {"sip.callID": "SCL_1"}}}
+    )
+    assert not egress._is_sip_participant({"participant": {"kind": "STANDARD"}})
+    assert not egress._is_sip_participant({})
+
+
+def test_room_name_accessor():
+    """Test room name is read from dict events and tolerates missing rooms"""
+    assert egress._room_name({"room": {"name": "lobby"}}) == "lobby"
+    assert egress._room_name({"room": None}) is None